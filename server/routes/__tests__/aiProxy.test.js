@@ -0,0 +1,163 @@
+/**
+ * @jest-environment node
+ */
+const fs = require("fs");
+const http = require("http");
+const os = require("os");
+const nodePath = require("path");
+const express = require("express");
+
+jest.mock("../../utils/ollamaHttp");
+// Pass every upload through untouched — the tests only care about the Ollama calls
+jest.mock("sharp", () => () => ({
+  metadata: async () => ({ format: "jpeg", space: "srgb", hasProfile: false, width: 1, height: 1 }),
+}));
+
+const MODEL = "gemma3:4b";
+
+/** Let the route's async steps (multer, model lookup, queue) run. */
+const tick = () => new Promise((resolve) => setTimeout(resolve, 20));
+
+async function waitFor(condition) {
+  for (let i = 0; i < 100 && !condition(); i++) await tick();
+  if (!condition()) throw new Error("condition not met in time");
+}
+
+function request(baseUrl, method, path, { body, headers } = {}) {
+  return new Promise((resolve, reject) => {
+    const req = http.request(`${baseUrl}${path}`, { method, headers, agent: false }, (res) => {
+      let data = "";
+      res.on("data", (c) => (data += c));
+      res.on("end", () => resolve({ status: res.statusCode, body: data ? JSON.parse(data) : undefined }));
+    });
+    req.on("error", reject);
+    if (body) req.write(body);
+    req.end();
+  });
+}
+
+function postImage(baseUrl, image) {
+  const boundary = "----aiProxyTest";
+  const body = Buffer.concat([
+    Buffer.from(
+      `--${boundary}\r\nContent-Disposition: form-data; name="file"; filename="image.jpg"\r\n` +
+        "Content-Type: image/jpeg\r\n\r\n"
+    ),
+    image,
+    Buffer.from(`\r\n--${boundary}--\r\n`),
+  ]);
+  return request(baseUrl, "POST", "/ai-api/api/analyze", {
+    body,
+    headers: { "Content-Type": `multipart/form-data; boundary=${boundary}`, "Content-Length": body.length },
+  });
+}
+
+function ollamaReply(filename) {
+  const response = JSON.stringify({ filename, alt_text: `${filename} photo`, cta: "" });
+  return { status: 200, body: JSON.stringify({ response }) };
+}
+
+describe("aiProxy /api/analyze in-flight sharing", () => {
+  let server;
+  let baseUrl;
+  let generateCalls;
+  let userDataDir;
+
+  /** Ollama /api/generate calls that carry an image (i.e. not model preloads). */
+  const analyzeCalls = () => generateCalls.filter((c) => c.payload.images);
+
+  beforeEach(async () => {
+    jest.resetModules();
+    userDataDir = fs.mkdtempSync(nodePath.join(os.tmpdir(), "ai-proxy-test-"));
+    process.env.ELECTRON_USER_DATA = userDataDir;
+
+    const ollamaHttp = require("../../utils/ollamaHttp");
+    ollamaHttp.httpGet.mockResolvedValue({ status: 200, body: JSON.stringify({ models: [{ name: MODEL }] }) });
+    generateCalls = [];
+    ollamaHttp.httpPost.mockImplementation(
+      (url, payload) =>
+        new Promise((resolve) => {
+          generateCalls.push({ url, payload, resolve });
+        })
+    );
+
+    const app = express();
+    app.use("/ai-api", require("../aiProxy"));
+    server = app.listen(0);
+    await new Promise((resolve) => server.once("listening", resolve));
+    baseUrl = `http://127.0.0.1:${server.address().port}`;
+  });
+
+  afterEach(async () => {
+    await new Promise((resolve) => server.close(resolve));
+    delete process.env.ELECTRON_USER_DATA;
+    fs.rmSync(userDataDir, { recursive: true, force: true });
+  });
+
+  it("makes one Ollama call for concurrent requests with the same image", async () => {
+    const image = Buffer.from("same image");
+    const first = postImage(baseUrl, image);
+    await waitFor(() => analyzeCalls().length === 1);
+    const second = postImage(baseUrl, image);
+    await tick();
+
+    analyzeCalls()[0].resolve(ollamaReply("shared"));
+    const [a, b] = await Promise.all([first, second]);
+
+    expect(analyzeCalls()).toHaveLength(1);
+    // Neither answer came from the cache: the second request joined the pending call
+    expect(a.body).toMatchObject({ filename: "shared", cached: false });
+    expect(b.body).toMatchObject({ filename: "shared", cached: false });
+  });
+
+  it.each([
+    ["DELETE /api/cache", (url) => request(url, "DELETE", "/ai-api/api/cache")],
+    [
+      "PUT /api/settings",
+      (url) =>
+        request(url, "PUT", "/ai-api/api/settings", {
+          body: JSON.stringify({ prompt: "new prompt" }),
+          headers: { "Content-Type": "application/json" },
+        }),
+    ],
+  ])("does not cache a call that was pending during %s", async (_name, invalidate) => {
+    const image = Buffer.from("stale image");
+    const stale = postImage(baseUrl, image);
+    await waitFor(() => analyzeCalls().length === 1);
+
+    await invalidate(baseUrl);
+    analyzeCalls()[0].resolve(ollamaReply("stale"));
+    expect((await stale).body).toMatchObject({ filename: "stale" });
+
+    // The old answer must not have been written back: this goes to Ollama again
+    const fresh = postImage(baseUrl, image);
+    await waitFor(() => analyzeCalls().length === 2);
+    analyzeCalls()[1].resolve(ollamaReply("fresh"));
+    expect((await fresh).body).toMatchObject({ filename: "fresh", cached: false });
+  });
+
+  it("does not let an invalidated call remove a newer call's in-flight entry", async () => {
+    const image = Buffer.from("raced image");
+    const old = postImage(baseUrl, image);
+    await waitFor(() => analyzeCalls().length === 1);
+
+    await request(baseUrl, "DELETE", "/ai-api/api/cache");
+    // Queued behind the old call (concurrency 1), registered under the same key
+    const newer = postImage(baseUrl, image);
+    await tick();
+
+    analyzeCalls()[0].resolve(ollamaReply("old"));
+    await old;
+    await waitFor(() => analyzeCalls().length === 2);
+
+    // Still in flight, so this must join the newer call rather than start a third
+    const joined = postImage(baseUrl, image);
+    await tick();
+    analyzeCalls()[1].resolve(ollamaReply("newer"));
+
+    const [newerRes, joinedRes] = await Promise.all([newer, joined]);
+    expect(analyzeCalls()).toHaveLength(2);
+    expect(newerRes.body).toMatchObject({ filename: "newer", cached: false });
+    expect(joinedRes.body).toMatchObject({ filename: "newer", cached: false });
+  });
+});
@@ -15,11 +15,12 @@
 
 const express = require("express");
 const multer = require("multer");
-const https = require("https");
-const http = require("http");
 const fs = require("fs");
 const nodePath = require("path");
 const { createHash } = require("crypto");
+const { httpGet, httpPost } = require("../utils/ollamaHttp");
+const { LruCache } = require("../utils/lruCache");
+const { createRequestQueue } = require("../utils/requestQueue");
 
 const router = express.Router();
 const upload = multer({ storage: multer.memoryStorage(), limits: { fileSize: 20 * 1024 * 1024 } });
@@ -53,12 +54,22 @@ function persistSettings(data) {
 
 // ── In-memory state (initialised from persisted file) ────────────────────────
 
+/** Positive integer from an env var, or undefined when unset or invalid. */
+function positiveIntEnv(name) {
+  const n = parseInt(process.env[name], 10);
+  return n > 0 ? n : undefined;
+}
+
 const _saved = loadPersistedSettings();
 let ollamaHost = (_saved.ollama_host || process.env.OLLAMA_HOST || "http://localhost:11434").replace(/\/$/, "");
 let ollamaModel = _saved.model || process.env.OLLAMA_MODEL || "gemma3:4b";
 let modelTemperature = _saved.temperature ?? 0.1;
 let modelNumPredict = _saved.num_predict ?? 64;
 let modelNumCtx = _saved.num_ctx ?? 1024;
+// Ollama defaults to one thread per physical core. When it shares the machine with
+// this server (sharp resizes on libuv's pool) or the Electron renderer, capping it
+// avoids oversubscribing the CPU. Unset = let Ollama decide.
+const ollamaNumThread = positiveIntEnv("OLLAMA_NUM_THREAD");
 
 const DEFAULT_PROMPT =
   'Analyze this image and return a strictly formatted JSON object with these keys:\n' +
@@ -69,47 +80,53 @@ const DEFAULT_PROMPT =
 
 let modelPrompt = DEFAULT_PROMPT;
 
-const responseCache = new Map();
-const CACHE_MAX = 100;
+// Responses are a few hundred bytes; the byte cap only matters if a custom prompt
+// makes the model return something much larger. The TTL lets a re-pulled model
+// (same name, new weights) eventually replace stale answers.
+const responseCache = new LruCache({ maxEntries: 100, maxBytes: 1024 * 1024, ttlMs: 60 * 60 * 1000 });
+/** Pending analyses keyed like `responseCache`, so concurrent duplicates share one call. */
+const inFlight = new Map();
+// Bumped whenever cached answers become stale (settings change, cache cleared), so
+// analyses started before that point don't write their result back into the cache.
+let cacheGeneration = 0;
+
+/** Drop cached and pending analyses; returns how many cached entries were removed. */
+function invalidateAnalyses() {
+  const count = responseCache.size;
+  responseCache.clear();
+  inFlight.clear();
+  cacheGeneration++;
+  return count;
+}
 
 // ── Helpers ────────────────────────────────────────────────────────────────────
 
-function httpGet(url) {
-  return new Promise((resolve, reject) => {
-    const lib = url.startsWith("https") ? https : http;
-    const req = lib.get(url, { timeout: 5000 }, (res) => {
-      let body = "";
-      res.on("data", (c) => (body += c));
-      res.on("end", () => resolve({ status: res.statusCode, body }));
-    });
-    req.on("error", reject);
-    req.on("timeout", () => { req.destroy(); reject(new Error("timeout")); });
-  });
-}
+// A local Ollama usually serves only one or a few generations per model at once
+// (its OLLAMA_NUM_PARALLEL), so firing every analyze at it just makes later
+// requests sit in its queue while our 60s socket timeout runs out. Keep our own
+// FIFO instead, running OLLAMA_CONCURRENCY jobs at a time (set it to match
+// Ollama's parallelism; default 1). Image resizing for queued requests still
+// overlaps the running generations.
+//
+// Time spent waiting here also counts against the browser's 60s abort timer
+// (AiBackendClient.TIMEOUT). A job that hasn't started within 20s is answered
+// "busy" instead of being started so late that the client gives up
+// mid-generation — that leaves it at least ~40s to run.
+const generateQueue = createRequestQueue({
+  send: (payload) => httpPost(`${ollamaHost}/api/generate`, payload),
+  concurrency: positiveIntEnv("OLLAMA_CONCURRENCY") ?? 1,
+  maxQueued: 8,
+  maxWaitMs: 20000,
+});
 
-function httpPost(url, payload) {
-  return new Promise((resolve, reject) => {
-    const body = JSON.stringify(payload);
-    const parsed = new URL(url);
-    const lib = parsed.protocol === "https:" ? https : http;
-    const options = {
-      hostname: parsed.hostname,
-      port: parsed.port || (parsed.protocol === "https:" ? 443 : 80),
-      path: parsed.pathname + parsed.search,
-      method: "POST",
-      headers: { "Content-Type": "application/json", "Content-Length": Buffer.byteLength(body) },
-      timeout: 60000,
-    };
-    const req = lib.request(options, (res) => {
-      let data = "";
-      res.on("data", (c) => (data += c));
-      res.on("end", () => resolve({ status: res.statusCode, body: data }));
-    });
-    req.on("error", reject);
-    req.on("timeout", () => { req.destroy(); reject(new Error("Ollama request timeout")); });
-    req.write(body);
-    req.end();
-  });
+/** Generation options shared by every /api/generate call. */
+function generationOptions() {
+  return {
+    temperature: modelTemperature,
+    num_predict: modelNumPredict,
+    num_ctx: modelNumCtx,
+    ...(ollamaNumThread ? { num_thread: ollamaNumThread } : {}),
+  };
 }
 
 /** Model names currently pulled in Ollama (empty array if Ollama is unreachable). */
@@ -127,8 +144,16 @@ async function getInstalledModels() {
 async function resizeImageToJpeg(buffer) {
   try {
     const sharp = require("sharp");
-    return await sharp(buffer)
-      .resize(768, 768, { fit: "inside", withoutEnlargement: true })
+    const image = sharp(buffer);
+    // metadata() only parses the header. A JPEG that already fits, is sRGB and has no
+    // embedded ICC profile (which libvips still reports as "srgb" — e.g. Display P3)
+    // would be decoded and re-encoded into the same pixels — send it as is.
+    const { format, space, hasProfile, width = 0, height = 0 } = await image.metadata();
+    if (format === "jpeg" && space === "srgb" && !hasProfile && width <= 768 && height <= 768) return buffer;
+    // The result only feeds a vision model, so the default lanczos3 kernel buys
+    // nothing over the cheaper cubic one (4x4 taps instead of 6x6).
+    return await image
+      .resize(768, 768, { fit: "inside", withoutEnlargement: true, kernel: "cubic" })
       .jpeg({ quality: 85 })
       .toBuffer();
   } catch {
@@ -136,6 +161,19 @@ async function resizeImageToJpeg(buffer) {
   }
 }
 
+/**
+ * Ask Ollama to load `model` into memory without generating anything (a generate
+ * call with no prompt), so the first real analysis doesn't pay the multi-second
+ * load. Fire-and-forget: failures just mean the first request loads it instead.
+ */
+function preloadModel(model) {
+  httpPost(`${ollamaHost}/api/generate`, { model }).catch(() => {});
+}
+
+// Opt-in: loading the model at startup pins several GB of RAM even if the
+// session never touches AI features.
+if (process.env.OLLAMA_PRELOAD === "1") preloadModel(ollamaModel);
+
 // ── Routes ─────────────────────────────────────────────────────────────────────
 
 // Health check — checks Ollama connectivity
@@ -154,15 +192,13 @@ router.get("/api/models", async (_req, res) => {
   res.json({ models: await getInstalledModels() });
 });
 
-// Analyze image via Ollama
-router.post("/api/analyze", upload.single("file"), async (req, res) => {
-  if (!req.file) return res.status(400).json({ error: "No file provided" });
-
-  const cacheKey = createHash("md5").update(req.file.buffer).digest("hex");
-  if (responseCache.has(cacheKey)) {
-    return res.json({ ...responseCache.get(cacheKey), cached: true });
-  }
-
+/**
+ * Runs one image through Ollama and caches successful results.
+ * Resolves to `{ status, body }` rather than writing to `res` so that concurrent
+ * requests for the same image can share a single call (see `inFlight`).
+ */
+async function analyzeImage(buffer, cacheKey) {
+  const generation = cacheGeneration;
   try {
     // Each profile persists its own model choice (ollama-settings.json under its own
     // ELECTRON_USER_DATA) — a fresh profile that never touched Settings falls back to
@@ -171,9 +207,10 @@ router.post("/api/analyze", upload.single("file"), async (req, res) => {
     const installed = await getInstalledModels();
     let modelWarning;
     if (installed.length === 0) {
-      return res.status(503).json({
-        error: `Ollama has no models installed. Run "ollama pull <model>" (e.g. qwen3.5:4b) first.`,
-      });
+      return {
+        status: 503,
+        body: { error: `Ollama has no models installed. Run "ollama pull <model>" (e.g. qwen3.5:4b) first.` },
+      };
     }
     if (!installed.includes(ollamaModel)) {
       const fallback = installed[0];
@@ -188,7 +225,7 @@ router.post("/api/analyze", upload.single("file"), async (req, res) => {
       });
     }
 
-    const optimized = await resizeImageToJpeg(req.file.buffer);
+    const optimized = await resizeImageToJpeg(buffer);
     const base64Image = optimized.toString("base64");
 
     const payload = {
@@ -200,12 +237,15 @@ router.post("/api/analyze", upload.single("file"), async (req, res) => {
       // Reasoning models (e.g. qwen3.5) otherwise dump the JSON answer into `thinking`
       // and leave `response` empty — force the final answer into `response`.
       think: false,
-      options: { temperature: modelTemperature, num_predict: modelNumPredict, num_ctx: modelNumCtx },
+      options: generationOptions(),
     };
 
-    const r = await httpPost(`${ollamaHost}/api/generate`, payload);
+    const r = await generateQueue.enqueue(payload);
+    if (!r) {
+      return { status: 503, body: { error: "Ollama is busy with other images. Try again in a moment." } };
+    }
     if (r.status !== 200) {
-      return res.status(503).json({ error: `Ollama returned ${r.status}` });
+      return { status: 503, body: { error: `Ollama returned ${r.status}` } };
     }
 
     let parsed = {};
@@ -216,30 +256,57 @@ router.post("/api/analyze", upload.single("file"), async (req, res) => {
       parsed = { filename: "image", alt_text: "Image", cta: "" };
     }
 
+    const filename = String(parsed.filename || "image");
+    const altText = String(parsed.alt_text || "Image");
+    const cta = String(parsed.cta || "");
+
     const response = {
-      filename: String(parsed.filename || "image"),
-      alt_text: String(parsed.alt_text || "Image"),
-      cta: String(parsed.cta || ""),
-      candidates: {
-        filenames: [String(parsed.filename || "image")],
-        alt_texts: [String(parsed.alt_text || "Image")],
-      },
-      raw: { ocr: String(parsed.cta || ""), caption: String(parsed.alt_text || "Image"), tags: [] },
+      filename,
+      alt_text: altText,
+      cta,
+      candidates: { filenames: [filename], alt_texts: [altText] },
+      raw: { ocr: cta, caption: altText, tags: [] },
       cached: false,
       ...(modelWarning ? { warning: modelWarning } : {}),
     };
 
-    if (responseCache.size >= CACHE_MAX) responseCache.delete(responseCache.keys().next().value);
-    responseCache.set(cacheKey, response);
+    if (generation === cacheGeneration) responseCache.set(cacheKey, response);
 
-    res.json(response);
+    return { status: 200, body: response };
   } catch (err) {
     const msg = err.message || "Unknown error";
     if (msg.includes("ECONNREFUSED") || msg.includes("timeout")) {
-      return res.status(503).json({ error: `Cannot connect to Ollama at ${ollamaHost}. Is it running?` });
+      return { status: 503, body: { error: `Cannot connect to Ollama at ${ollamaHost}. Is it running?` } };
     }
-    res.status(500).json({ error: msg });
+    return { status: 500, body: { error: msg } };
+  }
+}
+
+// Analyze image via Ollama
+router.post("/api/analyze", upload.single("file"), async (req, res) => {
+  if (!req.file) return res.status(400).json({ error: "No file provided" });
+
+  const cacheKey = createHash("md5").update(req.file.buffer).digest("hex");
+  const hit = responseCache.get(cacheKey);
+  if (hit) {
+    return res.json({ ...hit, cached: true });
+  }
+
+  // The image converter fires one analyze per image, and re-dropping the same
+  // file while the first call is still generating is common. Piggyback on the
+  // pending Ollama call instead of queueing a duplicate generation behind it.
+  let pending = inFlight.get(cacheKey);
+  if (!pending) {
+    const started = analyzeImage(req.file.buffer, cacheKey).finally(() => {
+      // After invalidateAnalyses() the key may already belong to a newer call
+      if (inFlight.get(cacheKey) === started) inFlight.delete(cacheKey);
+    });
+    pending = started;
+    inFlight.set(cacheKey, pending);
   }
+
+  const { status, body } = await pending;
+  res.status(status).json(body);
 });
 
 // Test model with a text-only prompt — returns response + latency
@@ -253,7 +320,7 @@ router.post("/api/test", express.json(), async (req, res) => {
       stream: false,
       format: "json",
       think: false,
-      options: { temperature: modelTemperature, num_predict: modelNumPredict, num_ctx: modelNumCtx },
+      options: generationOptions(),
     };
     const r = await httpPost(`${ollamaHost}/api/generate`, payload);
     const latency_ms = Date.now() - start;
@@ -269,9 +336,7 @@ router.post("/api/test", express.json(), async (req, res) => {
 
 // Clear cache
 router.delete("/api/cache", (_req, res) => {
-  const count = responseCache.size;
-  responseCache.clear();
-  res.json({ cleared: count });
+  res.json({ cleared: invalidateAnalyses() });
 });
 
 // Get all current settings
@@ -290,13 +355,18 @@ router.get("/api/settings", (_req, res) => {
 // Update settings (all fields optional)
 router.put("/api/settings", express.json(), (req, res) => {
   const { ollama_host, model, temperature, num_predict, num_ctx, prompt } = req.body || {};
+  const prevTarget = `${ollamaHost} ${ollamaModel}`;
   if (ollama_host && typeof ollama_host === "string") ollamaHost = ollama_host.replace(/\/$/, "");
   if (model && typeof model === "string") ollamaModel = model;
   if (typeof temperature === "number") modelTemperature = temperature;
   if (typeof num_predict === "number") modelNumPredict = num_predict;
   if (typeof num_ctx === "number") modelNumCtx = num_ctx;
   if (typeof prompt === "string") modelPrompt = prompt || DEFAULT_PROMPT;
-  responseCache.clear();
+  invalidateAnalyses();
+  // Picking a model in Settings is a strong hint it's about to be used — start loading
+  // it now. Not while analyses are running or queued, though: those still ask for the
+  // old model, and on a machine that can't hold both Ollama would swap back and forth.
+  if (`${ollamaHost} ${ollamaModel}` !== prevTarget && generateQueue.isIdle()) preloadModel(ollamaModel);
   persistSettings({ ollama_host: ollamaHost, model: ollamaModel, temperature: modelTemperature, num_predict: modelNumPredict, num_ctx: modelNumCtx });
   res.json({ ollama_host: ollamaHost, model: ollamaModel, temperature: modelTemperature, num_predict: modelNumPredict, num_ctx: modelNumCtx, prompt: modelPrompt });
 });
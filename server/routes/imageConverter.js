@@ -1,8 +1,16 @@
 const express = require("express");
 const multer = require("multer");
-const sharp = require("sharp");
 const { isPrivateOrLocalHost } = require("../utils/ssrfGuard");
 
+// sharp is loaded on first use rather than at require time: loading libvips is a
+// noticeable chunk of server startup, which the Electron app pays on every launch
+// even if the image converter is never opened.
+let sharpModule;
+function getSharp() {
+  if (!sharpModule) sharpModule = require("sharp");
+  return sharpModule;
+}
+
 const router = express.Router();
 
 /**
@@ -246,7 +254,7 @@ router.post("/convert", upload.single("image"), async (req, res) => {
       }
     }
 
-    let pipeline = sharp(req.file.buffer);
+    let pipeline = getSharp()(req.file.buffer);
 
     // Handle resize
     if (resizeMode === "preset" && preset) {
@@ -383,7 +391,7 @@ router.post("/convert-from-url", async (req, res) => {
       return res.send(result.buffer);
     }
 
-    let pipeline = sharp(inputBuffer);
+    let pipeline = getSharp()(inputBuffer);
     const presetNum = preset ? parseInt(preset, 10) : undefined;
     if (resizeMode === "preset" && presetNum) {
       pipeline = pipeline.resize(presetNum, presetNum, {
@@ -460,7 +468,7 @@ router.post("/convert-batch", upload.array("images", 50), async (req, res) => {
             continue;
           }
         }
-        let pipeline = sharp(file.buffer);
+        let pipeline = getSharp()(file.buffer);
 
         // Handle resize
         if (resizeMode === "preset" && preset) {
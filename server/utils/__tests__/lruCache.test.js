@@ -0,0 +1,90 @@
+/**
+ * @jest-environment node
+ */
+const { LruCache } = require("../lruCache");
+
+// Every test value below is a 10-byte JSON string ("aaaaaaaa" + quotes)
+const value = (ch) => ch.repeat(8);
+
+describe("LruCache", () => {
+  afterEach(() => {
+    jest.restoreAllMocks();
+  });
+
+  it("evicts the least recently used entry, counting hits as uses", () => {
+    const cache = new LruCache({ maxEntries: 2 });
+    cache.set("a", value("a"));
+    cache.set("b", value("b"));
+    expect(cache.get("a")).toBe(value("a"));
+
+    cache.set("c", value("c"));
+
+    expect(cache.get("b")).toBeUndefined();
+    expect(cache.get("a")).toBe(value("a"));
+    expect(cache.get("c")).toBe(value("c"));
+  });
+
+  it("evicts oldest entries once the byte budget is exceeded", () => {
+    const cache = new LruCache({ maxBytes: 25 });
+    cache.set("a", value("a"));
+    cache.set("b", value("b"));
+    expect(cache.bytes).toBe(20);
+
+    cache.set("c", value("c"));
+
+    expect(cache.get("a")).toBeUndefined();
+    expect(cache.size).toBe(2);
+    expect(cache.bytes).toBe(20);
+  });
+
+  it("rejects a single value larger than the byte budget without evicting others", () => {
+    const cache = new LruCache({ maxBytes: 25 });
+    cache.set("a", value("a"));
+
+    cache.set("big", "x".repeat(100));
+
+    expect(cache.get("big")).toBeUndefined();
+    expect(cache.get("a")).toBe(value("a"));
+    expect(cache.bytes).toBe(10);
+  });
+
+  it("treats entries older than the TTL as missing", () => {
+    const now = jest.spyOn(Date, "now").mockReturnValue(1000);
+    const cache = new LruCache({ ttlMs: 500 });
+    cache.set("a", value("a"));
+    cache.set("b", value("b"));
+
+    now.mockReturnValue(1499);
+    expect(cache.get("a")).toBe(value("a"));
+
+    now.mockReturnValue(1500);
+    expect(cache.get("a")).toBeUndefined();
+    // Expired but never read: still not counted
+    expect(cache.size).toBe(0);
+    expect(cache.bytes).toBe(0);
+  });
+
+  it("returns bytes to 0 after delete and clear", () => {
+    const cache = new LruCache();
+    cache.set("a", value("a"));
+    cache.set("b", value("b"));
+
+    expect(cache.delete("a")).toBe(true);
+    expect(cache.delete("a")).toBe(false);
+    expect(cache.bytes).toBe(10);
+
+    cache.clear();
+    expect(cache.size).toBe(0);
+    expect(cache.bytes).toBe(0);
+  });
+
+  it("replaces an existing key without double-counting its size", () => {
+    const cache = new LruCache();
+    cache.set("a", value("a"));
+    cache.set("a", value("b"));
+
+    expect(cache.get("a")).toBe(value("b"));
+    expect(cache.size).toBe(1);
+    expect(cache.bytes).toBe(10);
+  });
+});
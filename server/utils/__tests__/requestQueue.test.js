@@ -0,0 +1,121 @@
+/**
+ * @jest-environment node
+ */
+const { createRequestQueue } = require("../requestQueue");
+
+/** Let pending promise callbacks run (fake timers don't touch microtasks). */
+async function flush() {
+  for (let i = 0; i < 10; i++) await Promise.resolve();
+}
+
+/** A `send` mock whose calls stay pending until resolved/rejected by the test. */
+function controllableSend() {
+  const calls = [];
+  const send = jest.fn(
+    (payload) =>
+      new Promise((resolve, reject) => {
+        calls.push({ payload, resolve, reject });
+      })
+  );
+  return { send, calls };
+}
+
+describe("createRequestQueue", () => {
+  beforeEach(() => {
+    jest.useFakeTimers();
+  });
+
+  afterEach(() => {
+    jest.useRealTimers();
+  });
+
+  it("runs at most `concurrency` calls at once", async () => {
+    const { send, calls } = controllableSend();
+    const queue = createRequestQueue({ send, concurrency: 2 });
+
+    queue.enqueue("a");
+    queue.enqueue("b");
+    queue.enqueue("c");
+    await flush();
+
+    expect(send).toHaveBeenCalledTimes(2);
+    expect(queue.running).toBe(2);
+    expect(queue.waiting).toBe(1);
+
+    calls[0].resolve("A");
+    await flush();
+
+    expect(send).toHaveBeenCalledTimes(3);
+    expect(queue.running).toBe(2);
+    expect(queue.waiting).toBe(0);
+  });
+
+  it("starts waiting jobs in FIFO order and resolves each with its own result", async () => {
+    const { send, calls } = controllableSend();
+    const queue = createRequestQueue({ send, concurrency: 1 });
+
+    const results = ["a", "b", "c"].map((p) => queue.enqueue(p));
+    for (let i = 0; i < 3; i++) {
+      await flush();
+      calls[i].resolve(calls[i].payload.toUpperCase());
+    }
+
+    await expect(Promise.all(results)).resolves.toEqual(["A", "B", "C"]);
+    expect(send.mock.calls.map(([p]) => p)).toEqual(["a", "b", "c"]);
+    expect(queue.isIdle()).toBe(true);
+  });
+
+  it("resolves null without calling send when the backlog is full", async () => {
+    const { send } = controllableSend();
+    const queue = createRequestQueue({ send, concurrency: 1, maxQueued: 2 });
+
+    queue.enqueue("running");
+    queue.enqueue("waiting-1");
+    queue.enqueue("waiting-2");
+
+    await expect(queue.enqueue("overflow")).resolves.toBeNull();
+    await flush();
+    expect(send).toHaveBeenCalledTimes(1);
+    expect(queue.waiting).toBe(2);
+  });
+
+  it("resolves null and leaves the queue when a job waits longer than maxWaitMs", async () => {
+    const { send, calls } = controllableSend();
+    const queue = createRequestQueue({ send, concurrency: 1, maxWaitMs: 20000 });
+
+    queue.enqueue("running");
+    const late = queue.enqueue("late");
+    await flush();
+
+    jest.advanceTimersByTime(19999);
+    expect(queue.waiting).toBe(1);
+
+    jest.advanceTimersByTime(1);
+    await expect(late).resolves.toBeNull();
+    expect(queue.waiting).toBe(0);
+
+    // The expired job must not be started once the slot frees up
+    calls[0].resolve("done");
+    await flush();
+    expect(send).toHaveBeenCalledTimes(1);
+    expect(queue.isIdle()).toBe(true);
+  });
+
+  it("frees the running slot when send rejects", async () => {
+    const { send, calls } = controllableSend();
+    const queue = createRequestQueue({ send, concurrency: 1 });
+
+    const failing = queue.enqueue("fails");
+    const next = queue.enqueue("next");
+    await flush();
+
+    calls[0].reject(new Error("ECONNREFUSED"));
+    await expect(failing).rejects.toThrow("ECONNREFUSED");
+    await flush();
+
+    expect(send).toHaveBeenCalledTimes(2);
+    expect(queue.running).toBe(1);
+    calls[1].resolve("ok");
+    await expect(next).resolves.toBe("ok");
+  });
+});
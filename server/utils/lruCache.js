@@ -0,0 +1,83 @@
+/**
+ * Small in-memory LRU cache bounded by entry count, total size and age.
+ * Backed by a Map, whose insertion order doubles as recency order: hits are
+ * re-inserted at the tail and eviction always takes the head, both O(1).
+ */
+
+class LruCache {
+  /**
+   * @param {object} [options]
+   * @param {number} [options.maxEntries] max number of entries kept
+   * @param {number} [options.maxBytes] max total size of all entries, as measured by `sizeOf`
+   * @param {number} [options.ttlMs] entries older than this are treated as missing
+   * @param {(value: unknown) => number} [options.sizeOf] defaults to the UTF-8 length of the JSON form
+   */
+  constructor({ maxEntries = 100, maxBytes = Infinity, ttlMs = Infinity, sizeOf = jsonByteLength } = {}) {
+    this.maxEntries = maxEntries;
+    this.maxBytes = maxBytes;
+    this.ttlMs = ttlMs;
+    this.sizeOf = sizeOf;
+    /** @type {Map<string, { value: unknown, bytes: number, expiresAt: number }>} */
+    this.entries = new Map();
+    this.bytes = 0;
+  }
+
+  /** Number of live entries. Expired ones are purged first so they aren't counted. */
+  get size() {
+    this.purgeExpired();
+    return this.entries.size;
+  }
+
+  get(key) {
+    const entry = this.entries.get(key);
+    if (!entry) return undefined;
+    this.entries.delete(key);
+    if (entry.expiresAt <= Date.now()) {
+      this.bytes -= entry.bytes;
+      return undefined;
+    }
+    this.entries.set(key, entry);
+    return entry.value;
+  }
+
+  set(key, value) {
+    this.delete(key);
+    const bytes = this.sizeOf(value);
+    // A single value over budget would just evict everything else and then itself
+    if (bytes > this.maxBytes) return;
+
+    this.entries.set(key, { value, bytes, expiresAt: Date.now() + this.ttlMs });
+    this.bytes += bytes;
+    while (this.entries.size > this.maxEntries || this.bytes > this.maxBytes) {
+      const [oldestKey, oldest] = this.entries.entries().next().value;
+      this.entries.delete(oldestKey);
+      this.bytes -= oldest.bytes;
+    }
+  }
+
+  delete(key) {
+    const entry = this.entries.get(key);
+    if (!entry) return false;
+    this.entries.delete(key);
+    this.bytes -= entry.bytes;
+    return true;
+  }
+
+  purgeExpired() {
+    const now = Date.now();
+    for (const [key, entry] of this.entries) {
+      if (entry.expiresAt <= now) this.delete(key);
+    }
+  }
+
+  clear() {
+    this.entries.clear();
+    this.bytes = 0;
+  }
+}
+
+function jsonByteLength(value) {
+  return Buffer.byteLength(JSON.stringify(value));
+}
+
+module.exports = { LruCache };
@@ -0,0 +1,73 @@
+/**
+ * FIFO in front of a backend that only serves a few requests at once (Ollama's
+ * /api/generate). Runs at most `concurrency` calls to `send` at a time and keeps
+ * at most `maxQueued` waiting. A job that hasn't started within `maxWaitMs`
+ * resolves to null instead of being started too late to be useful.
+ */
+
+/**
+ * @template P, R
+ * @param {object} options
+ * @param {(payload: P) => Promise<R>} options.send performs the actual call
+ * @param {number} [options.concurrency] max calls to `send` in flight
+ * @param {number} [options.maxQueued] max jobs waiting for a free slot
+ * @param {number} [options.maxWaitMs] max time a job may wait for a free slot
+ */
+function createRequestQueue({ send, concurrency = 1, maxQueued = 8, maxWaitMs = 20000 }) {
+  /** @type {Array<{ start: () => void, timer: NodeJS.Timeout }>} */
+  const waiting = [];
+  let running = 0;
+
+  function startNext() {
+    const next = waiting.shift();
+    if (!next) return;
+    clearTimeout(next.timer);
+    next.start();
+  }
+
+  /**
+   * Resolves to `send(payload)`'s result, or to null (without calling `send`) when
+   * the backlog is full or the job waited longer than `maxWaitMs`.
+   * @param {P} payload
+   * @returns {Promise<R | null>}
+   */
+  function enqueue(payload) {
+    return new Promise((resolve, reject) => {
+      const start = () => {
+        running++;
+        Promise.resolve()
+          .then(() => send(payload))
+          .then(resolve, reject)
+          .finally(() => {
+            running--;
+            startNext();
+          });
+      };
+      if (running < concurrency) return start();
+      if (waiting.length >= maxQueued) return resolve(null);
+
+      const entry = {
+        start,
+        timer: setTimeout(() => {
+          waiting.splice(waiting.indexOf(entry), 1);
+          resolve(null);
+        }, maxWaitMs),
+      };
+      waiting.push(entry);
+    });
+  }
+
+  return {
+    enqueue,
+    /** True when nothing is running or waiting. */
+    isIdle: () => running === 0 && waiting.length === 0,
+    get running() {
+      return running;
+    },
+    get waiting() {
+      return waiting.length;
+    },
+  };
+}
+
+module.exports = { createRequestQueue };
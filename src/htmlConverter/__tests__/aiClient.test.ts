@@ -0,0 +1,20 @@
+// aiClient.ts pulls in config/api.ts, which uses import.meta.env (Vite-only
+// syntax the ts-jest CJS transform can't parse) — stub it out.
+jest.mock("@/config/api", () => ({ getApiBase: () => "" }));
+
+import { normalizeAiFilenameSuggestion } from "../utils/ocr/aiClient";
+
+describe("AI filename suggestion normalization", () => {
+  it("should fold accented letters to ASCII instead of dropping them", () => {
+    expect(normalizeAiFilenameSuggestion("café")).toBe("cafe");
+    expect(normalizeAiFilenameSuggestion("naïve_über")).toBe("naive-uber");
+  });
+
+  it("should still treat letters without an ASCII decomposition as separators", () => {
+    expect(normalizeAiFilenameSuggestion("Straße")).toBe("stra-e");
+  });
+
+  it("should drop stop words and collapse separators", () => {
+    expect(normalizeAiFilenameSuggestion("  The Summer -- Sale of 2024! ")).toBe("summer-sale-2024");
+  });
+});
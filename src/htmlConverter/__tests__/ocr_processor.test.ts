@@ -9,3 +9,24 @@ describe("OCR processor filename suggestions", () => {
   });
 });
 
+describe("OCR processor line filtering", () => {
+  it("should drop symbol-heavy lines from the UI text", () => {
+    const result = processOcrOutput("SALE ### !!! @@@\nBIG SALE TODAY", { spellCorrect: false });
+
+    expect(result.ocrText).toBe("BIG SALE TODAY");
+  });
+
+  // Digits count as alphanumeric, non-ASCII letters as symbols: 11 alphanumeric
+  // and 9 symbols is exactly the 0.45 ratio, which is still kept
+  it("should keep a line whose symbol ratio is exactly at the threshold", () => {
+    const result = processOcrOutput("PRIX NOËL 2024 ÉÀÔÛÊÎÏÇ", { spellCorrect: false });
+
+    expect(result.ocrText).toBe("PRIX NOËL 2024 ÉÀÔÛÊÎÏÇ");
+  });
+
+  it("should drop a line one symbol past the threshold", () => {
+    const result = processOcrOutput("PRIX NOËL 2024 ÉÀÔÛÊÎÏÇÑ\nBIG SALE TODAY", { spellCorrect: false });
+
+    expect(result.ocrText).toBe("BIG SALE TODAY");
+  });
+});
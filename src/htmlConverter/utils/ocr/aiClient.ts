@@ -33,16 +33,37 @@ function polishAiAltText(text: string): string {
   return truncateAlt(cleanupAltCandidate(t));
 }
 
-function normalizeAiFilenameSuggestion(value: string): string {
+/**
+ * Turn a model-suggested filename into a lowercase, hyphenated slug. Accents are
+ * folded to ASCII; letters with no ASCII decomposition ("ß") still act as separators.
+ */
+export function normalizeAiFilenameSuggestion(value: string): string {
   const words = String(value || "")
+    // Fold accents to ASCII first ("café" -> "cafe") instead of losing the letter
+    .normalize("NFKD")
+    .replace(/[\u0300-\u036f]/g, "")
     .toLowerCase()
-    .replace(/[^a-z0-9\s_-]/g, " ")
-    .split(/[\s_-]+/)
+    .split(/[^a-z0-9]+/)
     .filter(Boolean)
     .filter((w) => !FILENAME_STOP_WORDS.has(w));
 
-  const normalized = words.join("-");
-  return normalized.replace(/-+/g, "-").replace(/^-+|-+$/g, "");
+  // Words were split on hyphens and empties dropped, so the join can't produce
+  // leading, trailing or doubled hyphens — no cleanup pass needed.
+  return words.join("-");
+}
+
+/**
+ * Normalize raw backend suggestions in a single pass, skipping empty inputs and
+ * anything shorter than 3 characters after normalization
+ */
+function collectSuggestions(values: string[], normalize: (value: string) => string): string[] {
+  const out: string[] = [];
+  for (const value of values) {
+    if (!value) continue;
+    const normalized = normalize(value);
+    if (normalized.length >= 3) out.push(normalized);
+  }
+  return out;
 }
 
 /**
@@ -121,8 +142,6 @@ export class AiBackendClient {
         signal: controller.signal,
       });
 
-      clearTimeout(timeoutId);
-
       if (!response.ok) {
         const errorText = await response.text().catch(() => response.statusText);
         // Backend errors are `{ "error": "..." }` — surface that message directly
@@ -148,15 +167,9 @@ export class AiBackendClient {
       const cta = data.cta || "";
 
       // Apply accessibility best practices to alt suggestions
-      const altSuggestions = rawAltCandidates
-        .filter((s: string) => s)
-        .map((s: string) => polishAiAltText(s))
-        .filter((s: string) => s && s.length >= 3);
-
-      const nameSuggestions = filenameCandidates
-        .filter((s: string) => s)
-        .map((s: string) => normalizeAiFilenameSuggestion(s))
-        .filter((s: string) => s && s.length >= 3);
+      const altSuggestions = collectSuggestions(rawAltCandidates, polishAiAltText);
+
+      const nameSuggestions = collectSuggestions(filenameCandidates, normalizeAiFilenameSuggestion);
 
       // Format CTA as action description
       const ctaSuggestions = cta ? [formatCtaAsAction(cta)] : [];
@@ -8,9 +8,22 @@ import { cleanOcrText, cleanupAltCandidate, isAllCapsLike, isTitleCaseLike,norma
 
 type LineType = "junk" | "cta" | "content" | "year";
 
+// Line classification patterns, run for every OCR line of every analysis
+const HAS_ALNUM_RE = /[a-zA-Z0-9]/;
+const ONLY_SYMBOLS_RE = /^[|_.,\-–—=]+$/;
+const REPEATED_CHAR_RE = /(.)\1{5,}/;
+const URL_RE = /\bhttps?:\/\//i;
+const CTA_PHRASE_RE = /\b(click|learn|read|sign|subscribe|buy|shop|view)\s+(here|more|up|now)\b/i;
+const CTA_WORD_RE = /\b(click|subscribe)\b/i;
+const YEAR_ONLY_RE = /^\d{4}$/;
+const YEAR_RE = /\b(19|20)\d{2}\b/;
+const STRONG_CTA_RE = /\b(click here|learn more|sign up)\b/i;
+const CLICK_RE = /\bclick\b/i;
+
 interface ProcessedLine {
   raw: string;
   normalized: string;
+  index: number; // position among kept lines, for restoring original order
   tokens: string[];
   type: LineType;
   score: number;
@@ -53,7 +66,7 @@ export function processOcrOutput(
 
     const analysis = analyzeLine(normalized);
     if (analysis.type !== "junk") {
-      lines.push({ raw: rawLine, normalized, ...analysis });
+      lines.push({ raw: rawLine, normalized, index: lines.length, ...analysis });
     }
   }
 
@@ -81,15 +94,14 @@ function analyzeLine(line: string): { tokens: string[]; type: LineType; score: n
 
   // Quick Junk Filter
   if (line.length < 2 || line.length > 320) return junk();
-  if (!/[a-zA-Z0-9]/.test(line)) return junk();
-  if (/^[|_.,\-–—=]+$/.test(line)) return junk(); // Only symbols
-  if (/(.)\1{5,}/.test(line)) return junk(); // RRRRRR
+  if (!HAS_ALNUM_RE.test(line)) return junk();
+  if (ONLY_SYMBOLS_RE.test(line)) return junk(); // Only symbols
+  if (REPEATED_CHAR_RE.test(line)) return junk(); // RRRRRR
 
-  const alphaNum = (line.match(/[a-zA-Z0-9]/g) || []).length;
-  const nonWord = (line.match(/[^a-zA-Z0-9\s]/g) || []).length;
+  const { letters, alphaNum, nonWord } = countCharClasses(line);
   // Too many symbols vs letters
   if (alphaNum > 0 && nonWord / (alphaNum + nonWord) > 0.45) return junk();
-  if (/\bhttps?:\/\//i.test(line)) return junk();
+  if (URL_RE.test(line)) return junk();
 
   // Token Analysis
   let wordLikeCount = 0;
@@ -107,7 +119,6 @@ function analyzeLine(line: string): { tokens: string[]; type: LineType; score: n
     }
 
     // Long but no letters
-    const letters = (line.match(/[A-Za-z]/g) || []).length;
     if (tokens.length >= 8 && letters < 18) return junk();
   } else {
     // Single token must be decent
@@ -116,16 +127,15 @@ function analyzeLine(line: string): { tokens: string[]; type: LineType; score: n
 
   // Classification
   let type: LineType = "content";
-  if (/\b(click|learn|read|sign|subscribe|buy|shop|view)\s+(here|more|up|now)\b/i.test(line)) type = "cta";
-  else if (/^\d{4}$/.test(line) || /\b(19|20)\d{2}\b/.test(line)) type = "year";
-  else if (/\b(click|subscribe)\b/i.test(line)) type = "cta";
+  if (CTA_PHRASE_RE.test(line)) type = "cta";
+  else if (YEAR_ONLY_RE.test(line) || YEAR_RE.test(line)) type = "year";
+  else if (CTA_WORD_RE.test(line)) type = "cta";
 
   // Scoring
   const len = line.length;
   const capsBonus = isAllCapsLike(line) ? 18 : 0;
   const titleBonus = isTitleCaseLike(line) ? 10 : 0;
   const idealLenBonus = len >= 8 && len <= 80 ? 18 : len >= 3 && len <= 120 ? 8 : -8;
-  const symbols = (line.match(/[^a-zA-Z0-9\s]/g) || []).length;
 
   const score =
     alphaNum * 0.5 +
@@ -133,11 +143,30 @@ function analyzeLine(line: string): { tokens: string[]; type: LineType; score: n
     idealLenBonus +
     capsBonus +
     titleBonus -
-    symbols * 2;
+    nonWord * 2;
 
   return { tokens, type, score, wordLikeCount };
 }
 
+/**
+ * Count letters, alphanumerics and symbols in a single pass instead of one
+ * regex `match` (and array allocation) per class. Lines arrive
+ * whitespace-normalized, so anything that is not ASCII alphanumeric or a
+ * space is a symbol — same as `/[^a-zA-Z0-9\s]/`.
+ */
+function countCharClasses(line: string): { letters: number; alphaNum: number; nonWord: number } {
+  let letters = 0;
+  let digits = 0;
+  let nonWord = 0;
+  for (let i = 0; i < line.length; i++) {
+    const c = line.charCodeAt(i);
+    if ((c >= 65 && c <= 90) || (c >= 97 && c <= 122)) letters++;
+    else if (c >= 48 && c <= 57) digits++;
+    else if (c !== 32) nonWord++;
+  }
+  return { letters, alphaNum: letters + digits, nonWord };
+}
+
 function junk() {
   return { tokens: [], type: "junk" as LineType, score: -999, wordLikeCount: 0 };
 }
@@ -145,7 +174,7 @@ function junk() {
 function isWordLike(token: string): boolean {
   const core = token.replace(/[^A-Za-z0-9]/g, "");
   if (!core) return false;
-  if (/^\d{4}$/.test(core)) return true;
+  if (YEAR_ONLY_RE.test(core)) return true;
   if (/^\d+$/.test(core)) return false;
   const up = core.toUpperCase();
   if (up.length >= 4) return true;
@@ -174,15 +203,15 @@ function extractFromLines(lines: ProcessedLine[]) {
     .slice(0, 2);
 
   // CTA fallback
-  const hasStrongCta = ctaSuggestions.some(c => /\b(click here|learn more|sign up)\b/i.test(c));
-  if (!hasStrongCta && lines.some(l => /\bclick\b/i.test(l.normalized))) {
+  const hasStrongCta = ctaSuggestions.some(c => STRONG_CTA_RE.test(c));
+  if (!hasStrongCta && lines.some(l => CLICK_RE.test(l.normalized))) {
     ctaSuggestions.unshift("CLICK HERE");
   }
 
   // Combined headline for name fallback
   const topForHeadline = sorted
     .slice(0, 3)
-    .sort((a, b) => lines.indexOf(a) - lines.indexOf(b)) // maintain original order
+    .sort((a, b) => a.index - b.index) // maintain original order
     .map(l => l.normalized);
 
   const combinedHeadline = cleanupAltCandidate(truncateAlt(topForHeadline.join(" ")));